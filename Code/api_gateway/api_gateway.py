@@ -1,10 +1,20 @@
 import os
 import grpc
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional
 
+# Import generated protobuf code
+import order_service_pb2
+import order_service_pb2_grpc
+import admin_service_pb2
+import admin_service_pb2_grpc
+
+from profiling import (SamplingProfiler, MemoryTracker, dump_threads, check_debug_token,
+                       clamp_profile_seconds, clamp_memory_seconds, DEBUG_TOKEN_METADATA)
+
 # Create FastAPI app
 app = FastAPI(title="Food Delivery API Gateway")
 
@@ -12,6 +22,29 @@ app = FastAPI(title="Food Delivery API Gateway")
 ORDER_SERVICE_ADDRESS = os.getenv("ORDER_SERVICE_ADDRESS", "order-service:50051")
 PAYMENT_SERVICE_ADDRESS = os.getenv("PAYMENT_SERVICE_ADDRESS", "payment-service:50052")
 
+# Shared channel to the Order Service, reused across requests since cart
+# previews are far more frequent than orders
+order_channel = grpc.insecure_channel(ORDER_SERVICE_ADDRESS)
+order_stub = order_service_pb2_grpc.OrderServiceStub(order_channel)
+
+# Debug endpoints are disabled unless a token is configured
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN")
+
+# Profiling for the gateway itself, and admin stubs for the backend services
+profiler = SamplingProfiler("api-gateway")
+# The gateway's per-request allocations happen in fastapi, pydantic and grpc,
+# so track every module rather than only this file
+memory_tracker = MemoryTracker({}, None)
+admin_stubs = {
+    "order": admin_service_pb2_grpc.AdminServiceStub(order_channel),
+    "payment": admin_service_pb2_grpc.AdminServiceStub(
+        grpc.insecure_channel(PAYMENT_SERVICE_ADDRESS)
+    )
+}
+
+# Extra time allowed on forwarded debug calls beyond the requested window
+DEBUG_RPC_MARGIN = 5
+
 # model for API requests/responses
 class OrderItem(BaseModel):
     name: str
@@ -38,6 +71,53 @@ class UpdateOrderStatusRequest(BaseModel):
     status: int
     notes: Optional[str] = None
 
+class QuoteRequest(BaseModel):
+    restaurant_id: str
+    items: List[OrderItem]
+
+class QuoteBatchRequest(BaseModel):
+    carts: List[QuoteRequest]
+
+class QuoteResponse(BaseModel):
+    restaurant_id: str
+    subtotal: float
+    tax: float
+    delivery_fee: float
+    total: float
+
+def _quote_prices(carts):
+    """Call the Order Service to price a list of carts."""
+    request = order_service_pb2.PriceQuoteRequest(
+        carts=[
+            order_service_pb2.Cart(
+                restaurant_id=cart.restaurant_id,
+                items=[
+                    order_service_pb2.OrderItem(
+                        name=item.name,
+                        quantity=item.quantity,
+                        price=item.price
+                    ) for item in cart.items
+                ]
+            ) for cart in carts
+        ]
+    )
+    try:
+        response = order_stub.QuotePrices(request)
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            raise HTTPException(status_code=400, detail=e.details())
+        raise HTTPException(status_code=502, detail=f"Order service error: {e.details()}")
+    
+    return [
+        QuoteResponse(
+            restaurant_id=quote.restaurant_id,
+            subtotal=quote.subtotal,
+            tax=quote.tax,
+            delivery_fee=quote.delivery_fee,
+            total=quote.total
+        ) for quote in response.quotes
+    ]
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -46,6 +126,89 @@ async def health_check():
         "payment_service": PAYMENT_SERVICE_ADDRESS
     }}
 
+# Price preview for a single cart
+@app.post("/quote", response_model=QuoteResponse)
+def quote_cart(cart: QuoteRequest):
+    return _quote_prices([cart])[0]
+
+# Price preview for several carts in one call
+@app.post("/quotes", response_model=List[QuoteResponse])
+def quote_carts(request: QuoteBatchRequest):
+    return _quote_prices(request.carts)
+
+def _check_debug_access(token, service):
+    """Reject debug requests without a valid token or for an unknown service."""
+    if not check_debug_token(token, DEBUG_TOKEN):
+        raise HTTPException(status_code=404, detail="Not Found")
+    if service != "gateway" and service not in admin_stubs:
+        raise HTTPException(status_code=400, detail=f"Unknown service {service}")
+
+def _debug_metadata():
+    """gRPC metadata authorizing admin calls to the backend services."""
+    return ((DEBUG_TOKEN_METADATA, DEBUG_TOKEN),)
+
+# Sample stacks for N seconds and return them in collapsed-stack format,
+# ready for flamegraph.pl or speedscope
+@app.get("/debug/profile", response_class=PlainTextResponse)
+def debug_profile(seconds: int = 10, interval_ms: int = 10, service: str = "gateway",
+                  x_debug_token: Optional[str] = Header(None)):
+    _check_debug_access(x_debug_token, service)
+    seconds = clamp_profile_seconds(seconds, wait=True)
+    
+    if service == "gateway":
+        run = profiler.start(seconds, interval_ms)
+        if run is None:
+            raise HTTPException(status_code=409, detail="A profile is already running")
+        return run.wait()
+    
+    try:
+        response = admin_stubs[service].StartProfile(admin_service_pb2.ProfileRequest(
+            seconds=seconds, interval_ms=interval_ms, wait=True
+        ), metadata=_debug_metadata(), timeout=seconds + DEBUG_RPC_MARGIN)
+    except grpc.RpcError as e:
+        raise HTTPException(status_code=502, detail=f"{service} service error: {e.details()}")
+    return response.collapsed_stacks
+
+# Current stack of every thread, including the gRPC worker pool
+@app.get("/debug/threads", response_class=PlainTextResponse)
+def debug_threads(service: str = "gateway", x_debug_token: Optional[str] = Header(None)):
+    _check_debug_access(x_debug_token, service)
+    
+    if service == "gateway":
+        dump, _ = dump_threads()
+        return dump
+    
+    try:
+        response = admin_stubs[service].DumpThreads(admin_service_pb2.DumpThreadsRequest(),
+                                                    metadata=_debug_metadata(),
+                                                    timeout=DEBUG_RPC_MARGIN)
+    except grpc.RpcError as e:
+        raise HTTPException(status_code=502, detail=f"{service} service error: {e.details()}")
+    return response.dump
+
+# tracemalloc diff over N seconds; tracing is switched off again afterwards
+@app.get("/debug/memory")
+def debug_memory(seconds: int = 10, limit: int = 10, service: str = "gateway",
+                 x_debug_token: Optional[str] = Header(None)):
+    _check_debug_access(x_debug_token, service)
+    seconds = clamp_memory_seconds(seconds)
+    
+    if service == "gateway":
+        diff = memory_tracker.trace(seconds, limit)
+        if diff is None:
+            raise HTTPException(status_code=409, detail="A memory trace is already running")
+        store_sizes = memory_tracker.store_sizes()
+    else:
+        try:
+            response = admin_stubs[service].MemorySnapshot(admin_service_pb2.MemorySnapshotRequest(
+                limit=limit, seconds=seconds
+            ), metadata=_debug_metadata(), timeout=seconds + DEBUG_RPC_MARGIN)
+        except grpc.RpcError as e:
+            raise HTTPException(status_code=502, detail=f"{service} service error: {e.details()}")
+        diff, store_sizes = response.diff, dict(response.store_sizes)
+    
+    return {"diff": diff.splitlines(), "store_sizes": store_sizes}
+
 if __name__ == "__main__":
     # Get port from environment or use default
     port_env = os.getenv("API_GATEWAY_PORT", "8000")
@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+import uuid
+import random
+import argparse
+import datetime
+import resource
+import tempfile
+
+from tiering import TieredStore
+
+# OrderStatus values from order_service.proto
+ORDER_CONFIRMED = 1
+ORDER_DELIVERED = 5
+ORDER_CANCELLED = 6
+
+
+def resident_memory_mb():
+    """Current resident set size of this process in MB, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except OSError:
+        return None
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process so far in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_order(rng, created_at):
+    """Build an order dict shaped like the ones CreateOrder stores."""
+    items = [
+        {'name': f"Item {rng.randrange(500)}", 'quantity': rng.randint(1, 4),
+         'price': round(rng.uniform(1.0, 30.0), 2)}
+        for _ in range(rng.randint(1, 6))
+    ]
+    subtotal = round(sum(item['price'] * item['quantity'] for item in items), 2)
+    timestamp = created_at.isoformat()
+    return {
+        'order_id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'customer_id': f"cust-{rng.randrange(100000)}",
+        'restaurant_id': f"rest-{rng.randrange(500)}",
+        'items': items,
+        'subtotal': subtotal,
+        'tax': round(subtotal * 0.08, 2),
+        'delivery_fee': 2.99,
+        'total': round(subtotal * 1.08 + 2.99, 2),
+        'status': ORDER_CONFIRMED,
+        'payment_status': 2,
+        'created_at': timestamp,
+        'updated_at': timestamp
+    }
+
+
+def simulate_week(store, orders_per_hour, tiering, seed=42):
+    """Replay a week of orders hour by hour, tiering once per simulated hour."""
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1)
+    in_flight = []
+
+    print(f"{'Day':>4} {'Hot orders':>12} {'Cold orders':>12} {'RSS (MB)':>10} {'Peak RSS (MB)':>14}")
+    for hour in range(7 * 24):
+        now = start + datetime.timedelta(hours=hour)
+
+        # Orders placed in the previous hour are delivered or cancelled by now
+        for order in in_flight:
+            order['status'] = ORDER_CANCELLED if rng.random() < 0.1 else ORDER_DELIVERED
+            order['updated_at'] = now.isoformat()
+
+        in_flight = []
+        for _ in range(orders_per_hour):
+            order = make_order(rng, now + datetime.timedelta(seconds=rng.randrange(3600)))
+            store.hot[order['order_id']] = order
+            in_flight.append(order)
+
+        if tiering:
+            store.evict(now=now)
+
+        if hour % 24 == 23:
+            rss = resident_memory_mb()
+            print(f"{hour // 24 + 1:>4} {len(store.hot):>12,} {store.cold_count:>12,} "
+                  f"{rss if rss is not None else float('nan'):>10.1f} {peak_memory_mb():>14.1f}")
+
+
+def measure_reads(store, keys, label):
+    """Time get() for the given keys and print latency percentiles."""
+    latencies = []
+    for key in keys:
+        start = time.perf_counter()
+        store.get(key)
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    mean = sum(latencies) / len(latencies) * 1e6
+    print(f"{label}: mean {mean:.1f}us, p50 {p50:.1f}us, p99 {p99:.1f}us")
+
+
+def run_benchmark(orders_per_hour, tier_age, reads, tiering):
+    """Run the simulated week and then measure hot and cold read latency."""
+    print(" Tiering Benchmark ")
+    print(f"Orders per hour: {orders_per_hour}, Tier age: {tier_age}s, Tiering: {tiering}")
+
+    with tempfile.TemporaryDirectory() as segment_dir:
+        store = TieredStore(
+            {}, segment_dir if tiering else None, name='orders', max_age=tier_age,
+            is_cold=lambda order: order['status'] in (ORDER_DELIVERED, ORDER_CANCELLED)
+        )
+        simulate_week(store, orders_per_hour, tiering)
+
+        rng = random.Random(7)
+        hot_keys = rng.sample(list(store.hot), min(reads, len(store.hot)))
+        measure_reads(store, hot_keys, "Hot reads ")
+
+        if tiering and store.cold_count:
+            cold_keys = list(store.cold_keys())
+            measure_reads(store, rng.sample(cold_keys, min(reads, len(cold_keys))), "Cold reads")
+            print(f"Segments: {store.segment_count}, "
+                  f"{store.segment_bytes / (1024 * 1024):.1f} MB on disk")
+
+        print(f"Peak RSS: {peak_memory_mb():.1f} MB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tiering Benchmark')
+    parser.add_argument('--orders-per-hour', type=int, default=1000,
+                        help='Orders created per simulated hour')
+    parser.add_argument('--tier-age', type=int, default=86400,
+                        help='Seconds after the last update before a finished order is tiered')
+    parser.add_argument('--reads', type=int, default=5000,
+                        help='Number of reads for the latency measurement')
+    parser.add_argument('--no-tiering', action='store_true',
+                        help='Keep every order in memory, for comparison')
+
+    args = parser.parse_args()
+
+    run_benchmark(args.orders_per_hour, args.tier_age, args.reads, not args.no_tiering)
@@ -0,0 +1,294 @@
+import os
+import sys
+import hmac
+import time
+import logging
+import datetime
+import tempfile
+import threading
+import traceback
+import tracemalloc
+from collections import Counter
+
+import grpc
+
+# Import generated protobuf code
+import admin_service_pb2
+import admin_service_pb2_grpc
+
+logger = logging.getLogger(__name__)
+
+# Where collapsed-stack profiles are written when a file is requested
+PROFILE_DIR = os.getenv("PROFILE_DIR", tempfile.gettempdir())
+
+# Limits for a single profiling run. Runs that a caller waits for hold a
+# gRPC worker or gateway thread, so they get a much shorter limit than runs
+# that write to a file in the background.
+MAX_PROFILE_SECONDS = 300
+MAX_WAIT_PROFILE_SECONDS = 30
+DEFAULT_INTERVAL_MS = 10
+
+# Limits for a single memory tracing window, which also holds its caller
+MAX_MEMORY_SECONDS = 30
+DEFAULT_MEMORY_SECONDS = 10
+
+# gRPC metadata key carrying the debug token
+DEBUG_TOKEN_METADATA = 'x-debug-token'
+
+
+def check_debug_token(token, expected):
+    """Compare a debug token in constant time. An unset expected token never matches."""
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode(), expected.encode())
+
+
+def clamp_profile_seconds(seconds, wait):
+    """Limit a profiling window to what the caller is allowed to run."""
+    return max(1, min(seconds, MAX_WAIT_PROFILE_SECONDS if wait else MAX_PROFILE_SECONDS))
+
+
+def clamp_memory_seconds(seconds):
+    """Limit a memory tracing window to MAX_MEMORY_SECONDS."""
+    return max(1, min(seconds or DEFAULT_MEMORY_SECONDS, MAX_MEMORY_SECONDS))
+
+
+class ProfileRun:
+    """A single profiling window, sampled by a background thread."""
+
+    def __init__(self, output_path=None):
+        self.output_path = output_path
+        self.collapsed_stacks = ""
+        self.thread = None
+
+    def wait(self):
+        """Block until the run has finished and return its collapsed stacks."""
+        self.thread.join()
+        return self.collapsed_stacks
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads for a fixed window.
+
+    No thread runs and no hooks are installed until start() is called, so the
+    profiler costs nothing while it is switched off.
+    """
+
+    def __init__(self, name, output_dir=PROFILE_DIR):
+        self.name = name
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._run = None
+
+    @property
+    def running(self):
+        return self._run is not None and self._run.thread.is_alive()
+
+    def start(self, seconds, interval_ms=DEFAULT_INTERVAL_MS, write_file=False):
+        """Start sampling in the background. Returns a ProfileRun, or None if already running.
+
+        The collapsed stacks are kept in memory; they are also written to a file
+        in output_dir only when write_file is set.
+        """
+        seconds = clamp_profile_seconds(seconds, wait=not write_file)
+        interval = max(1, interval_ms or DEFAULT_INTERVAL_MS) / 1000
+
+        with self._lock:
+            if self.running:
+                return None
+
+            output_path = None
+            if write_file:
+                timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+                output_path = os.path.join(self.output_dir, f"{self.name}-{timestamp}.collapsed")
+
+            run = ProfileRun(output_path)
+            run.thread = threading.Thread(
+                target=self._sample,
+                args=(run, seconds, interval),
+                name=f"{self.name}-profiler",
+                daemon=True
+            )
+            self._run = run
+            run.thread.start()
+
+        logger.info(f"Profiling {self.name} for {seconds}s every {interval * 1000:.0f}ms")
+        return run
+
+    def _sample(self, run, seconds, interval):
+        """Collect samples until the deadline, then store them on the run."""
+        own_ident = threading.get_ident()
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    stacks[_collapse_stack(names.get(ident, str(ident)), frame)] += 1
+            time.sleep(interval)
+
+        run.collapsed_stacks = ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        if run.output_path:
+            with open(run.output_path, 'w') as f:
+                f.write(run.collapsed_stacks)
+            logger.info(f"Profile for {self.name} written to {run.output_path}")
+
+        logger.info(f"Profile for {self.name} finished with {sum(stacks.values())} samples")
+
+
+def _collapse_stack(thread_name, frame):
+    """Render a frame chain as a single root-first, semicolon-separated line."""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    frames.append(thread_name.replace(' ', '_'))
+    return ';'.join(reversed(frames))
+
+
+def dump_threads():
+    """Return a text dump of every thread's current stack, including gRPC workers."""
+    names = {thread.ident: thread for thread in threading.enumerate()}
+    frames = sys._current_frames()
+
+    lines = []
+    for ident, frame in frames.items():
+        thread = names.get(ident)
+        name = thread.name if thread else str(ident)
+        daemon = " daemon" if thread and thread.daemon else ""
+        lines.append(f"Thread {name} ({ident}){daemon}:")
+        lines.extend(line.rstrip('\n') for line in traceback.format_stack(frame))
+        lines.append("")
+    return '\n'.join(lines), len(frames)
+
+
+class MemoryTracker:
+    """Diffs tracemalloc snapshots of allocations made from the service modules.
+
+    With tracked_files set to None, allocations from every module are
+    included, which suits the gateway where most per-request allocations
+    happen inside fastapi, pydantic and grpc. tracemalloc slows down every
+    allocation while it is tracing, so it only runs for the window of a single
+    trace() call and is stopped afterwards.
+    """
+
+    def __init__(self, stores, tracked_files):
+        self.stores = stores
+        self.tracked_files = tracked_files
+        self._lock = threading.Lock()
+
+    def store_sizes(self):
+        """Get the number of records in each store, split into hot and cold for tiered stores."""
+        sizes = {}
+        for name, store in self.stores.items():
+            if hasattr(store, 'cold_count'):
+                sizes[f"{name}_hot"] = len(store.hot)
+                sizes[f"{name}_cold"] = store.cold_count
+            else:
+                sizes[name] = len(store)
+        return sizes
+
+    def trace(self, seconds=DEFAULT_MEMORY_SECONDS, limit=10):
+        """Trace allocations for a number of seconds and diff the start and end snapshots.
+
+        Returns the diff text, or None if another trace is already running.
+        """
+        seconds = clamp_memory_seconds(seconds)
+
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            # Leave tracing alone if it was enabled outside of this tracker
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            try:
+                logger.info(f"Tracing allocations for {seconds}s")
+                before = self._take_snapshot()
+                time.sleep(seconds)
+                after = self._take_snapshot()
+            finally:
+                if started:
+                    tracemalloc.stop()
+        finally:
+            self._lock.release()
+
+        stats = after.compare_to(before, 'lineno')
+        return '\n'.join(str(stat) for stat in stats[:limit or 10])
+
+    def _take_snapshot(self):
+        """Snapshot allocations attributed to the tracked source files."""
+        if self.tracked_files is None:
+            filters = [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+            ]
+        else:
+            filters = [
+                tracemalloc.Filter(True, f"*{os.path.basename(filename)}")
+                for filename in self.tracked_files
+            ]
+        return tracemalloc.take_snapshot().filter_traces(filters)
+
+
+class AdminServicer(admin_service_pb2_grpc.AdminServiceServicer):
+    """Implementation of the Admin Service gRPC service used for on-demand profiling.
+
+    Every call must carry the debug token in the x-debug-token metadata.
+    """
+
+    def __init__(self, name, stores, tracked_files, debug_token):
+        self.profiler = SamplingProfiler(name)
+        self.memory_tracker = MemoryTracker(stores, tracked_files)
+        self.debug_token = debug_token
+
+    def _authorized(self, context):
+        """Check the debug token sent with the call, rejecting it if missing or wrong."""
+        metadata = dict(context.invocation_metadata())
+        if check_debug_token(metadata.get(DEBUG_TOKEN_METADATA), self.debug_token):
+            return True
+        context.set_details("Invalid debug token")
+        context.set_code(grpc.StatusCode.PERMISSION_DENIED)
+        return False
+
+    def StartProfile(self, request, context):
+        """Switch on the sampling profiler for the requested number of seconds."""
+        if not self._authorized(context):
+            return admin_service_pb2.ProfileResponse()
+
+        # Without wait the caller can only get the result from a file
+        run = self.profiler.start(request.seconds, request.interval_ms, write_file=not request.wait)
+        if run is None:
+            context.set_details("A profile is already running")
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            return admin_service_pb2.ProfileResponse()
+
+        if request.wait:
+            return admin_service_pb2.ProfileResponse(collapsed_stacks=run.wait())
+        return admin_service_pb2.ProfileResponse(output_path=run.output_path)
+
+    def DumpThreads(self, request, context):
+        """Return the stacks of all threads in the process."""
+        if not self._authorized(context):
+            return admin_service_pb2.DumpThreadsResponse()
+
+        dump, thread_count = dump_threads()
+        return admin_service_pb2.DumpThreadsResponse(dump=dump, thread_count=thread_count)
+
+    def MemorySnapshot(self, request, context):
+        """Trace allocations made by the service for a number of seconds."""
+        if not self._authorized(context):
+            return admin_service_pb2.MemorySnapshotResponse()
+
+        diff = self.memory_tracker.trace(request.seconds, request.limit)
+        if diff is None:
+            context.set_details("A memory trace is already running")
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            return admin_service_pb2.MemorySnapshotResponse()
+
+        return admin_service_pb2.MemorySnapshotResponse(
+            diff=diff,
+            store_sizes=self.memory_tracker.store_sizes()
+        )
@@ -0,0 +1,421 @@
+import os
+import glob
+import json
+import mmap
+import zlib
+import struct
+import time
+import heapq
+import bisect
+import hashlib
+import logging
+import datetime
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Segment file layout:
+#   [block 0][block 1]...[block N][bloom filter][index][trailer]
+# Each block is zlib-compressed, sorted "\n<key>\t<record JSON>" lines, so a
+# lookup only has to decode the one matching record. The index is a
+# zlib-compressed JSON object holding the first key, offset and length of every
+# block, which is enough to find the one block that can hold a key. The bloom
+# filter lets lookups skip segments that do not hold the key at all.
+SEGMENT_MAGIC = b'TIERSEG2'
+TRAILER = struct.Struct('<QQ8s')
+
+# Records per compressed block
+DEFAULT_BLOCK_SIZE = 16
+
+# Bloom filter sizing, roughly a 1% false positive rate
+BLOOM_BITS_PER_KEY = 10
+BLOOM_HASHES = 7
+
+# Segments are merged once there are more than this many
+DEFAULT_MAX_SEGMENTS = 16
+
+# A compaction only pulls in an older segment while it is no larger than
+# this multiple of the newer segments already being merged, so the large
+# base segment is left alone until the small ones have grown to its size
+COMPACTION_SIZE_RATIO = 1
+
+
+def encode_record(record):
+    """Serialize a record the way it is stored in a segment block."""
+    return json.dumps(record, separators=(',', ':')).encode()
+
+
+def bloom_hashes(key):
+    """Hash a key once for bloom filter lookups across any number of segments."""
+    digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+def _bloom_positions(hashes, bloom_bits):
+    """Get the bloom filter bit positions for a key using double hashing."""
+    h1, h2 = hashes
+    return [(h1 + i * h2) % bloom_bits for i in range(BLOOM_HASHES)]
+
+
+def write_segment(path, items, expected_count, block_size=DEFAULT_BLOCK_SIZE):
+    """Write (key, encoded record) pairs, sorted by unique key, to an immutable segment file.
+
+    Records are consumed and written one block at a time, so items can be a
+    stream that is larger than memory. expected_count sizes the bloom filter and
+    may be an upper bound.
+    """
+    first_keys, offsets, lengths = [], [], []
+    last_key = None
+    count = 0
+
+    bloom_bits = max(8, expected_count * BLOOM_BITS_PER_KEY)
+    bloom = bytearray((bloom_bits + 7) // 8)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        def flush(lines, first_key):
+            block = zlib.compress(b''.join(lines))
+            first_keys.append(first_key)
+            offsets.append(f.tell())
+            lengths.append(len(block))
+            f.write(block)
+
+        lines = []
+        for key, record in items:
+            if not lines:
+                block_first_key = key
+            lines.append(b'\n' + key.encode() + b'\t' + record)
+            for position in _bloom_positions(bloom_hashes(key), bloom_bits):
+                bloom[position >> 3] |= 1 << (position & 7)
+            last_key = key
+            count += 1
+            if len(lines) == block_size:
+                flush(lines, block_first_key)
+                lines = []
+        if lines:
+            flush(lines, block_first_key)
+
+        if not count:
+            raise ValueError("Cannot write an empty segment")
+
+        bloom_offset = f.tell()
+        f.write(bloom)
+
+        index = zlib.compress(json.dumps({
+            'first_keys': first_keys,
+            'offsets': offsets,
+            'lengths': lengths,
+            'last_key': last_key,
+            'count': count,
+            'bloom_offset': bloom_offset,
+            'bloom_bits': bloom_bits
+        }).encode())
+        index_offset = f.tell()
+        f.write(index)
+        f.write(TRAILER.pack(index_offset, len(index), SEGMENT_MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Only make the segment visible once it is complete
+    os.replace(tmp_path, path)
+
+
+class Segment:
+    """Read-only, memory-mapped view of a segment file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self._mm)
+
+        index_offset, index_length, magic = TRAILER.unpack(self._mm[-TRAILER.size:])
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"{path} is not a segment file")
+
+        index = json.loads(zlib.decompress(self._mm[index_offset:index_offset + index_length]))
+        self.first_keys = index['first_keys']
+        self.offsets = index['offsets']
+        self.lengths = index['lengths']
+        self.last_key = index['last_key']
+        self.count = index['count']
+        self.bloom_offset = index['bloom_offset']
+        self.bloom_bits = index['bloom_bits']
+
+    def _read_block(self, i):
+        """Decompress a single block."""
+        offset = self.offsets[i]
+        return zlib.decompress(self._mm[offset:offset + self.lengths[i]])
+
+    def might_contain(self, hashes):
+        """Check the bloom filter; False means the key is definitely not here."""
+        mm, base = self._mm, self.bloom_offset
+        for position in _bloom_positions(hashes, self.bloom_bits):
+            if not mm[base + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def get(self, key, hashes=None):
+        """Look up a record by key, returning None if it is not in this segment."""
+        if key < self.first_keys[0] or key > self.last_key:
+            return None
+        if not self.might_contain(hashes or bloom_hashes(key)):
+            return None
+
+        block = self._read_block(bisect.bisect_right(self.first_keys, key) - 1)
+        start = block.find(b'\n' + key.encode() + b'\t')
+        if start < 0:
+            return None
+
+        start = block.index(b'\t', start + 1) + 1
+        end = block.find(b'\n', start)
+        return json.loads(block[start:end if end >= 0 else len(block)])
+
+    def raw_items(self):
+        """Iterate over every (key, encoded record) pair in key order, one block at a time."""
+        for i in range(len(self.offsets)):
+            for line in self._read_block(i).split(b'\n')[1:]:
+                key, record = line.split(b'\t', 1)
+                yield key.decode(), record
+
+    def items(self):
+        """Iterate over every (key, record) pair in key order."""
+        for key, record in self.raw_items():
+            yield key, json.loads(record)
+
+
+def _ranked_items(segment, rank):
+    """Tag a segment's records with its rank so that merging can prefer newer copies."""
+    for key, record in segment.raw_items():
+        yield key, rank, record
+
+
+def merge_segments(segments):
+    """Stream the records of segments, oldest first, as one sorted run.
+
+    Each segment is already sorted, so this is a k-way merge that only holds
+    one decompressed block per segment. When a key appears in several
+    segments, only the copy from the newest segment is kept.
+    """
+    merged = heapq.merge(*[
+        _ranked_items(segment, -i) for i, segment in enumerate(segments)
+    ])
+    previous_key = None
+    for key, _, record in merged:
+        if key != previous_key:
+            previous_key = key
+            yield key, record
+
+
+class TieredStore:
+    """Keeps recent records in a hot dict and moves finished ones to segment files.
+
+    Records for which is_cold() returns True and whose timestamp is older than
+    max_age seconds are written to a new segment and removed from the hot dict.
+    get() checks the hot dict first and then the segments, newest first.
+    Without a segment_dir the store only wraps the hot dict.
+
+    Existing records must be changed through update(). evict() only removes a
+    record from the hot dict if it is unchanged since it was written out, so
+    no change made while a segment is being written is lost.
+    """
+
+    def __init__(self, hot, segment_dir=None, name='store', max_age=86400, is_cold=None,
+                 timestamp_fields=('updated_at', 'created_at'),
+                 block_size=DEFAULT_BLOCK_SIZE, max_segments=DEFAULT_MAX_SEGMENTS):
+        self.hot = hot
+        self.segment_dir = segment_dir
+        self.name = name
+        self.max_age = max_age
+        self.is_cold = is_cold or (lambda record: True)
+        self.timestamp_fields = timestamp_fields
+        self.block_size = block_size
+        self.max_segments = max_segments
+
+        # _lock guards the hot dict and the segment list; _write_lock
+        # serializes evict() and compact(), which write segment files
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._segments = []
+        self._next_seq = 0
+
+        if segment_dir:
+            os.makedirs(segment_dir, exist_ok=True)
+            for path in sorted(glob.glob(os.path.join(segment_dir, f"{name}-*.seg"))):
+                self._segments.append(Segment(path))
+                self._next_seq = int(path[-12:-4]) + 1
+            if self._segments:
+                logger.info(f"Loaded {len(self._segments)} {name} segments from {segment_dir}")
+
+    def get(self, key):
+        """Get a record by key, falling back to the segments if it is not hot."""
+        record = self.hot.get(key)
+        if record is not None:
+            return record
+
+        hashes = bloom_hashes(key)
+        for segment in reversed(self._segments):
+            record = segment.get(key, hashes)
+            if record is not None:
+                return record
+        return None
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def put(self, key, record):
+        """Add a new record to the hot dict."""
+        self.hot[key] = record
+
+    def update(self, key, **fields):
+        """Set fields on a record and return it, or None if the key is unknown.
+
+        A record found in a segment is copied back into the hot dict first, where
+        the change shadows the stale copy on disk.
+        """
+        with self._lock:
+            record = self.get(key)
+            if record is None:
+                return None
+            record = self.hot.setdefault(key, record)
+            record.update(fields)
+            return record
+
+    @property
+    def cold_count(self):
+        """Number of records stored in segments, including superseded copies."""
+        return sum(segment.count for segment in self._segments)
+
+    @property
+    def segment_count(self):
+        return len(self._segments)
+
+    @property
+    def segment_bytes(self):
+        """Total size of the segment files on disk."""
+        return sum(segment.size for segment in self._segments)
+
+    def cold_keys(self):
+        """Iterate over the keys of every record stored in segments."""
+        for segment in self._segments:
+            for key, _ in segment.raw_items():
+                yield key
+
+    def _timestamp(self, record):
+        """Get the timestamp a record's age is measured from."""
+        for field in self.timestamp_fields:
+            if record.get(field):
+                return record[field]
+        return None
+
+    def evict(self, now=None):
+        """Move cold records older than max_age into a new segment. Returns the number moved."""
+        if not self.segment_dir:
+            return 0
+
+        now = now or datetime.datetime.now()
+        cutoff = (now - datetime.timedelta(seconds=self.max_age)).isoformat()
+
+        with self._write_lock:
+            with self._lock:
+                # ISO timestamps compare correctly as strings
+                candidates = []
+                for key, record in list(self.hot.items()):
+                    timestamp = self._timestamp(record)
+                    if timestamp and timestamp <= cutoff and self.is_cold(record):
+                        candidates.append((key, encode_record(record)))
+                if not candidates:
+                    return 0
+                path = self._segment_path(self._next_seq)
+                self._next_seq += 1
+
+            # Write without the lock so that updates and new orders are not
+            # held up by compression and fsync
+            candidates.sort()
+            write_segment(path, candidates, len(candidates), self.block_size)
+            segment = Segment(path)
+
+            with self._lock:
+                # Add the segment before dropping hot copies so that readers
+                # always find the record in one or the other
+                self._segments = self._segments + [segment]
+
+                # A record changed or replaced during the write keeps its hot
+                # copy, which shadows the stale one in the segment
+                moved = 0
+                for key, encoded in candidates:
+                    record = self.hot.get(key)
+                    if record is not None and encode_record(record) == encoded:
+                        del self.hot[key]
+                        moved += 1
+
+        logger.info(f"Moved {moved} {self.name} records to {path}")
+
+        if len(self._segments) > self.max_segments:
+            self.compact()
+        return moved
+
+    def _segment_path(self, seq):
+        return os.path.join(self.segment_dir, f"{self.name}-{seq:08d}.seg")
+
+    def _compaction_run(self, segments):
+        """Pick how many of the newest segments to merge.
+
+        The two newest segments are always merged, and older ones are added
+        while they are no larger than COMPACTION_SIZE_RATIO times the segments
+        picked so far, so each record is only rewritten a logarithmic number
+        of times rather than on every compaction.
+        """
+        count = min(2, len(segments))
+        total = sum(segment.size for segment in segments[-count:])
+        while count < len(segments) and segments[-count - 1].size <= total * COMPACTION_SIZE_RATIO:
+            count += 1
+            total += segments[-count].size
+        return count
+
+    def compact(self):
+        """Merge the newest, similarly sized segments into one, keeping the newest copy of each record.
+
+        The merge streams block by block and runs without holding the store
+        lock, so reads and updates carry on while it is written.
+        """
+        with self._write_lock:
+            segments = self._segments
+            if len(segments) < 2:
+                return
+            segments = segments[-self._compaction_run(segments):]
+
+            # Only the newest segments are merged and evict() cannot run
+            # meanwhile, so the merged segment takes the next sequence number
+            # and still sorts after every segment it does not replace
+            with self._lock:
+                path = self._segment_path(self._next_seq)
+                self._next_seq += 1
+
+            write_segment(path, merge_segments(segments),
+                          sum(segment.count for segment in segments), self.block_size)
+            merged = Segment(path)
+
+            with self._lock:
+                self._segments = self._segments[:-len(segments)] + [merged]
+
+        # Readers may still hold the old segments; their mappings stay valid
+        # after the files are unlinked and are released once unreferenced
+        for segment in segments:
+            os.remove(segment.path)
+
+        logger.info(f"Compacted {len(segments)} {self.name} segments into {path}")
+
+    def start(self, interval):
+        """Run evict() every interval seconds in a background thread."""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.evict()
+                except Exception as e:
+                    logger.error(f"Error tiering {self.name} records: {e}")
+
+        thread = threading.Thread(target=run, name=f"{self.name}-tiering", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,65 @@
+import argparse
+import random
+import time
+
+from pricing import PricingEngine
+
+
+def make_carts(count, restaurants, seed=42):
+    """Generate random (restaurant_id, items) carts for benchmarking."""
+    rng = random.Random(seed)
+    carts = []
+    for _ in range(count):
+        items = [
+            (round(rng.uniform(1.0, 30.0), 2), rng.randint(1, 4))
+            for _ in range(rng.randint(1, 8))
+        ]
+        carts.append((f"rest-{rng.randrange(restaurants)}", items))
+    return carts
+
+
+def run_benchmark(carts, restaurants, batch_size, rounds):
+    """Measure single-cart and batched quotes per second."""
+    engine = PricingEngine(restaurant_rates={
+        f"rest-{i}": {
+            'tax_bps': 500 + (i % 10) * 50,
+            'delivery_fees': [(0, 399 + (i % 5) * 50), (3000, 199), (6000, 0)]
+        } for i in range(restaurants)
+    })
+
+    print(" Pricing Engine Benchmark ")
+    print(f"Carts: {len(carts)}, Restaurants: {restaurants}, Batch size: {batch_size}, Rounds: {rounds}")
+
+    # Single cart quotes, as used by CreateOrder and cart previews
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for restaurant_id, items in carts:
+            engine.quote(restaurant_id, items)
+    elapsed = time.perf_counter() - start
+    print(f"Single quotes:  {len(carts) * rounds / elapsed:,.0f} quotes/sec")
+
+    # Batched quotes, as used by QuotePrices
+    batches = [carts[i:i + batch_size] for i in range(0, len(carts), batch_size)]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for batch in batches:
+            engine.quote_batch(batch)
+    elapsed = time.perf_counter() - start
+    print(f"Batched quotes: {len(carts) * rounds / elapsed:,.0f} quotes/sec")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pricing Engine Benchmark')
+    parser.add_argument('--carts', type=int, default=20000,
+                        help='Number of carts to price per round')
+    parser.add_argument('--restaurants', type=int, default=200,
+                        help='Number of restaurants with configured rates')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='Carts per QuotePrices batch')
+    parser.add_argument('--rounds', type=int, default=5,
+                        help='Number of rounds to run')
+
+    args = parser.parse_args()
+
+    run_benchmark(make_carts(args.carts, args.restaurants), args.restaurants,
+                  args.batch_size, args.rounds)
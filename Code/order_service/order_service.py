@@ -1,3 +1,4 @@
+import os
 import grpc
 import uuid
 import datetime
@@ -10,6 +11,12 @@ import order_service_pb2
 import order_service_pb2_grpc
 import payment_service_pb2
 import payment_service_pb2_grpc
+import admin_service_pb2_grpc
+
+from pricing import PricingEngine, from_cents
+from profiling import AdminServicer
+import tiering
+from tiering import TieredStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,11 +25,16 @@ logger = logging.getLogger(__name__)
 # In-memory database for simplicity
 orders_db = {}
 
+# Orders in these states are finished and can be moved to cold storage
+FINISHED_ORDER_STATUSES = (order_service_pb2.ORDER_DELIVERED, order_service_pb2.ORDER_CANCELLED)
+
 class OrderServicer(order_service_pb2_grpc.OrderServiceServicer):
     """Implementation of the Order Service gRPC service."""
     
-    def __init__(self, payment_service_address):
+    def __init__(self, payment_service_address, pricing_engine=None, order_store=None):
         self.payment_service_address = payment_service_address
+        self.pricing_engine = pricing_engine or PricingEngine()
+        self.order_store = order_store or TieredStore(orders_db)
     
     def _get_payment_stub(self):
         """Create a stub for the Payment Service."""
@@ -36,8 +48,17 @@ class OrderServicer(order_service_pb2_grpc.OrderServiceServicer):
         # Generate a unique order ID
         order_id = str(uuid.uuid4())
         
-        # Calculate total from items
-        total = sum(item.price * item.quantity for item in request.items)
+        # Price the cart in integer cents
+        try:
+            quote = self.pricing_engine.quote(
+                request.restaurant_id,
+                [(item.price, item.quantity) for item in request.items]
+            )
+        except ValueError as e:
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            return order_service_pb2.OrderResponse()
+        total = from_cents(quote.total)
         
         # Get current timestamp
         timestamp = datetime.datetime.now().isoformat()
@@ -54,14 +75,18 @@ class OrderServicer(order_service_pb2_grpc.OrderServiceServicer):
                     'price': item.price
                 } for item in request.items
             ],
+            'subtotal': from_cents(quote.subtotal),
+            'tax': from_cents(quote.tax),
+            'delivery_fee': from_cents(quote.delivery_fee),
             'total': total,
             'status': order_service_pb2.ORDER_PENDING,
             'payment_status': payment_service_pb2.PAYMENT_PENDING,
-            'created_at': timestamp
+            'created_at': timestamp,
+            'updated_at': timestamp
         }
         
         # Store order in database
-        orders_db[order_id] = order
+        self.order_store.put(order_id, order)
         
         logger.info(f"Created order {order_id} with total ${total:.2f}")
         
@@ -77,12 +102,11 @@ class OrderServicer(order_service_pb2_grpc.OrderServiceServicer):
             # Call payment service to process the payment
             payment_response = payment_stub.ProcessPayment(payment_request)
             
-            # Update order with payment information
-            order['payment_status'] = payment_response.status
-            
-            # Update order status based on payment result
+            # Update order with payment information, and its status based on the payment result
+            updates = {'payment_status': payment_response.status}
             if payment_response.status == payment_service_pb2.PAYMENT_COMPLETED:
-                order['status'] = order_service_pb2.ORDER_CONFIRMED
+                updates['status'] = order_service_pb2.ORDER_CONFIRMED
+            order = self.order_store.update(order_id, **updates) or order
             
             logger.info(f"Payment for order {order_id} processed with status: {payment_response.status}")
             
@@ -100,12 +124,13 @@ class OrderServicer(order_service_pb2_grpc.OrderServiceServicer):
         order_id = request.order_id
         logger.info(f"Getting order {order_id}")
         
-        if order_id not in orders_db:
+        # Falls back to cold storage for finished orders
+        order = self.order_store.get(order_id)
+        if order is None:
             context.set_details(f"Order {order_id} not found")
             context.set_code(grpc.StatusCode.NOT_FOUND)
             return order_service_pb2.OrderResponse()
         
-        order = orders_db[order_id]
         return self._create_order_response(order)
     
     def UpdateOrderStatus(self, request, context):
@@ -115,16 +140,17 @@ class OrderServicer(order_service_pb2_grpc.OrderServiceServicer):
         
         logger.info(f"Updating order {order_id} status to {new_status}")
         
-        if order_id not in orders_db:
+        # Orders in cold storage are moved back to the hot store by the update
+        order = self.order_store.update(
+            order_id,
+            status=new_status,
+            updated_at=datetime.datetime.now().isoformat()
+        )
+        if order is None:
             context.set_details(f"Order {order_id} not found")
             context.set_code(grpc.StatusCode.NOT_FOUND)
             return order_service_pb2.OrderResponse()
         
-        order = orders_db[order_id]
-        
-        # Update status
-        order['status'] = new_status
-        
         logger.info(f"Order {order_id} status updated to {new_status}")
         
         return self._create_order_response(order)
@@ -136,20 +162,45 @@ class OrderServicer(order_service_pb2_grpc.OrderServiceServicer):
         
         logger.info(f"Updating payment status for order {order_id} to {payment_status}")
         
-        if order_id not in orders_db:
+        order = self.order_store.update(
+            order_id,
+            payment_status=payment_status,
+            updated_at=datetime.datetime.now().isoformat()
+        )
+        if order is None:
             context.set_details(f"Order {order_id} not found")
             context.set_code(grpc.StatusCode.NOT_FOUND)
             return order_service_pb2.OrderResponse()
         
-        order = orders_db[order_id]
-        
-        # Update payment status
-        order['payment_status'] = payment_status
-        
         logger.info(f"Order {order_id} payment status updated to {payment_status}")
         
         return self._create_order_response(order)
     
+    def QuotePrices(self, request, context):
+        """Quote subtotal, tax and delivery fee for a batch of carts without creating orders."""
+        carts = [
+            (cart.restaurant_id, [(item.price, item.quantity) for item in cart.items])
+            for cart in request.carts
+        ]
+        try:
+            quotes = self.pricing_engine.quote_batch(carts)
+        except ValueError as e:
+            context.set_details(str(e))
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            return order_service_pb2.PriceQuoteResponse()
+        
+        return order_service_pb2.PriceQuoteResponse(
+            quotes=[
+                order_service_pb2.PriceQuote(
+                    restaurant_id=quote.restaurant_id,
+                    subtotal=from_cents(quote.subtotal),
+                    tax=from_cents(quote.tax),
+                    delivery_fee=from_cents(quote.delivery_fee),
+                    total=from_cents(quote.total)
+                ) for quote in quotes
+            ]
+        )
+    
     def _create_order_response(self, order):
         """Create an OrderResponse from an order dict."""
         # Create OrderItem messages
@@ -168,22 +219,52 @@ class OrderServicer(order_service_pb2_grpc.OrderServiceServicer):
             customer_id=order['customer_id'],
             restaurant_id=order['restaurant_id'],
             items=order_items,
+            subtotal=order['subtotal'],
+            tax=order['tax'],
+            delivery_fee=order['delivery_fee'],
             total=order['total'],
             status=order['status'],
             payment_status=order['payment_status'],
-            created_at=order['created_at']
+            created_at=order['created_at'],
+            updated_at=order.get('updated_at', '')
         )
 
-def serve(port, payment_service_address):
+def serve(port, payment_service_address, pricing_config=None, segment_dir=None,
+          tier_age=86400, tier_interval=300):
     """Start the gRPC server."""
+    if pricing_config:
+        pricing_engine = PricingEngine.from_file(pricing_config)
+    else:
+        pricing_engine = PricingEngine()
+    
+    # Move finished orders to compressed segment files once they are old enough
+    order_store = TieredStore(
+        orders_db, segment_dir, name='orders', max_age=tier_age,
+        is_cold=lambda order: order['status'] in FINISHED_ORDER_STATUSES
+    )
+    if segment_dir:
+        order_store.start(tier_interval)
+    
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
     order_service_pb2_grpc.add_OrderServiceServicer_to_server(
-        OrderServicer(payment_service_address), server
+        OrderServicer(payment_service_address, pricing_engine, order_store), server
     )
+    
+    # Profiling endpoints are only served when a debug token is configured
+    debug_token = os.getenv("DEBUG_TOKEN")
+    if debug_token:
+        admin_service_pb2_grpc.add_AdminServiceServicer_to_server(
+            AdminServicer('order-service', {'orders': order_store}, [__file__, tiering.__file__],
+                          debug_token),
+            server
+        )
+    
     server.add_insecure_port(f'[::]:{port}')
     server.start()
     logger.info(f"Order Service started on port {port}")
     logger.info(f"Connected to Payment Service at {payment_service_address}")
+    if segment_dir:
+        logger.info(f"Tiering finished orders older than {tier_age}s to {segment_dir}")
     try:
         while True:
             time.sleep(86400)  # One day in seconds
@@ -198,7 +279,16 @@ if __name__ == '__main__':
                         help='Port to listen on')
     parser.add_argument('--payment-service', type=str, default='localhost:50052',
                         help='Address of the Payment Service')
+    parser.add_argument('--pricing-config', type=str, default=None,
+                        help='Path to a JSON file with per-restaurant tax rates and delivery fees')
+    parser.add_argument('--segment-dir', type=str, default='segments',
+                        help='Directory for cold order segments (empty to disable tiering)')
+    parser.add_argument('--tier-age', type=int, default=86400,
+                        help='Seconds after the last update before a finished order is moved to cold storage')
+    parser.add_argument('--tier-interval', type=int, default=300,
+                        help='Seconds between tiering runs')
     
     args = parser.parse_args()
     
-    serve(args.port, args.payment_service)
\ No newline at end of file
+    serve(args.port, args.payment_service, args.pricing_config, args.segment_dir,
+          args.tier_age, args.tier_interval)
\ No newline at end of file
@@ -0,0 +1,127 @@
+import math
+import bisect
+import json
+import logging
+import functools
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+logger = logging.getLogger(__name__)
+
+# Tax rates are stored in basis points (1/100th of a percent) so that every
+# calculation stays in integer cents.
+DEFAULT_TAX_BPS = 800
+
+# Delivery fee tiers as (minimum subtotal in cents, fee in cents), e.g.
+# $4.99 below $25, $2.99 below $50 and free delivery from $50 upwards.
+DEFAULT_DELIVERY_FEES = [(0, 499), (2500, 299), (5000, 0)]
+
+# Largest accepted item price in dollars; anything above is treated as bad input
+MAX_ITEM_PRICE = 100000
+
+# Result of pricing a single cart, all amounts in integer cents
+Quote = namedtuple('Quote', ['restaurant_id', 'subtotal', 'tax', 'delivery_fee', 'total'])
+
+# Precomputed pricing row for one restaurant
+_RateRow = namedtuple('_RateRow', ['tax_bps', 'fee_thresholds', 'fees'])
+
+
+@functools.lru_cache(maxsize=4096)
+def to_cents(amount):
+    """Convert a dollar amount to integer cents, rounding half up.
+
+    The shortest repr of the float is rounded, so 1.005 becomes 101 cents even
+    though the nearest double is slightly below 1.005. Results are cached since
+    carts draw their prices from a small set of menu prices.
+    """
+    return int(Decimal(repr(amount)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) * 100)
+
+
+def from_cents(cents):
+    """Convert integer cents back to a dollar amount for protobuf double fields."""
+    return cents / 100
+
+
+def _compile_rates(tax_bps, delivery_fees):
+    """Build a lookup row from a tax rate and a list of delivery fee tiers."""
+    tiers = sorted((int(threshold), int(fee)) for threshold, fee in delivery_fees)
+    if not tiers or tiers[0][0] != 0:
+        raise ValueError("Delivery fee tiers must start at a subtotal of 0")
+    return _RateRow(
+        tax_bps=int(tax_bps),
+        fee_thresholds=tuple(threshold for threshold, _ in tiers),
+        fees=tuple(fee for _, fee in tiers)
+    )
+
+
+class PricingEngine:
+    """Prices carts in integer cents using per-restaurant tax rates and delivery fees."""
+
+    def __init__(self, restaurant_rates=None, tax_bps=DEFAULT_TAX_BPS,
+                 delivery_fees=DEFAULT_DELIVERY_FEES):
+        self._default = _compile_rates(tax_bps, delivery_fees)
+
+        # Precompute a row for every configured restaurant up front so that
+        # pricing only does a dict lookup per cart.
+        self._table = {}
+        for restaurant_id, rates in (restaurant_rates or {}).items():
+            self._table[restaurant_id] = _compile_rates(
+                rates.get('tax_bps', tax_bps),
+                rates.get('delivery_fees', delivery_fees)
+            )
+
+    @classmethod
+    def from_file(cls, path):
+        """Create an engine from a JSON pricing config file."""
+        with open(path) as f:
+            config = json.load(f)
+        default = config.get('default', {})
+        engine = cls(
+            restaurant_rates=config.get('restaurants', {}),
+            tax_bps=default.get('tax_bps', DEFAULT_TAX_BPS),
+            delivery_fees=default.get('delivery_fees', DEFAULT_DELIVERY_FEES)
+        )
+        logger.info(f"Loaded pricing for {len(engine._table)} restaurants from {path}")
+        return engine
+
+    def _rates_for(self, restaurant_id):
+        """Get the precomputed pricing row for a restaurant."""
+        return self._table.get(restaurant_id, self._default)
+
+    def quote(self, restaurant_id, items):
+        """Price a single cart given as (price, quantity) pairs.
+
+        Raises ValueError for quantities below 1 and for prices that are negative,
+        non-finite, above MAX_ITEM_PRICE or round to zero without being zero.
+        """
+        row = self._rates_for(restaurant_id)
+
+        subtotal = 0
+        for price, quantity in items:
+            if not math.isfinite(price) or price < 0 or price > MAX_ITEM_PRICE:
+                raise ValueError(f"Invalid item price {price}")
+            if quantity < 1:
+                raise ValueError(f"Invalid item quantity {quantity}")
+            cents = to_cents(price)
+            if cents == 0 and price > 0:
+                raise ValueError(f"Item price {price} is below half a cent")
+            subtotal += cents * quantity
+
+        # Round tax half up to the nearest cent
+        tax = (subtotal * row.tax_bps + 5000) // 10000
+        if subtotal > 0:
+            delivery_fee = row.fees[bisect.bisect_right(row.fee_thresholds, subtotal) - 1]
+        else:
+            delivery_fee = 0
+
+        return Quote(
+            restaurant_id=restaurant_id,
+            subtotal=subtotal,
+            tax=tax,
+            delivery_fee=delivery_fee,
+            total=subtotal + tax + delivery_fee
+        )
+
+    def quote_batch(self, carts):
+        """Price a list of (restaurant_id, items) carts, for callers that preview several at once."""
+        return [self.quote(restaurant_id, items) for restaurant_id, items in carts]
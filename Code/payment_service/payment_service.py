@@ -1,3 +1,4 @@
+import os
 import grpc
 import uuid
 import datetime
@@ -11,6 +12,11 @@ import payment_service_pb2
 import payment_service_pb2_grpc
 import order_service_pb2
 import order_service_pb2_grpc
+import admin_service_pb2_grpc
+
+from profiling import AdminServicer
+import tiering
+from tiering import TieredStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,8 +28,9 @@ transactions_db = {}
 class PaymentServicer(payment_service_pb2_grpc.PaymentServiceServicer):
     """Implementation of the Payment Service gRPC service."""
     
-    def __init__(self, order_service_address):
+    def __init__(self, order_service_address, transaction_store=None):
         self.order_service_address = order_service_address
+        self.transaction_store = transaction_store or TieredStore(transactions_db)
     
     def _get_order_stub(self):
         """Create a stub for the Order Service."""
@@ -66,7 +73,7 @@ class PaymentServicer(payment_service_pb2_grpc.PaymentServiceServicer):
         }
         
         # Store transaction in database
-        transactions_db[transaction_id] = transaction
+        self.transaction_store.put(transaction_id, transaction)
         
         # Notify Order Service about payment status update
         try:
@@ -91,12 +98,13 @@ class PaymentServicer(payment_service_pb2_grpc.PaymentServiceServicer):
         transaction_id = request.transaction_id
         logger.info(f"Getting transaction {transaction_id}")
         
-        if transaction_id not in transactions_db:
+        # Falls back to cold storage for old transactions
+        transaction = self.transaction_store.get(transaction_id)
+        if transaction is None:
             context.set_details(f"Transaction {transaction_id} not found")
             context.set_code(grpc.StatusCode.NOT_FOUND)
             return payment_service_pb2.PaymentResponse()
         
-        transaction = transactions_db[transaction_id]
         return self._create_payment_response(transaction)
     
     def _create_payment_response(self, transaction):
@@ -121,16 +129,36 @@ class PaymentServicer(payment_service_pb2_grpc.PaymentServiceServicer):
         else:
             return "Unknown Payment Method"
 
-def serve(port, order_service_address):
+def serve(port, order_service_address, segment_dir=None, tier_age=86400, tier_interval=300):
     """Start the gRPC server."""
+    # Move old transactions to compressed segment files
+    transaction_store = TieredStore(
+        transactions_db, segment_dir, name='transactions', max_age=tier_age,
+        timestamp_fields=('created_at',)
+    )
+    if segment_dir:
+        transaction_store.start(tier_interval)
+    
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
     payment_service_pb2_grpc.add_PaymentServiceServicer_to_server(
-        PaymentServicer(order_service_address), server
+        PaymentServicer(order_service_address, transaction_store), server
     )
+    
+    # Profiling endpoints are only served when a debug token is configured
+    debug_token = os.getenv("DEBUG_TOKEN")
+    if debug_token:
+        admin_service_pb2_grpc.add_AdminServiceServicer_to_server(
+            AdminServicer('payment-service', {'transactions': transaction_store},
+                          [__file__, tiering.__file__], debug_token),
+            server
+        )
+    
     server.add_insecure_port(f'[::]:{port}')
     server.start()
     logger.info(f"Payment Service started on port {port}")
     logger.info(f"Connected to Order Service at {order_service_address}")
+    if segment_dir:
+        logger.info(f"Tiering transactions older than {tier_age}s to {segment_dir}")
     try:
         while True:
             time.sleep(86400)  # One day in seconds
@@ -145,7 +173,13 @@ if __name__ == '__main__':
                         help='Port to listen on')
     parser.add_argument('--order-service', type=str, default='localhost:50051',
                         help='Address of the Order Service')
+    parser.add_argument('--segment-dir', type=str, default='segments',
+                        help='Directory for cold transaction segments (empty to disable tiering)')
+    parser.add_argument('--tier-age', type=int, default=86400,
+                        help='Seconds after creation before a transaction is moved to cold storage')
+    parser.add_argument('--tier-interval', type=int, default=300,
+                        help='Seconds between tiering runs')
     
     args = parser.parse_args()
     
-    serve(args.port, args.order_service)
\ No newline at end of file
+    serve(args.port, args.order_service, args.segment_dir, args.tier_age, args.tier_interval)
\ No newline at end of file
@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Make the service modules importable the same way they are inside their images
+for directory in ('common', 'order_service', 'payment_service'):
+    sys.path.insert(0, os.path.join(CODE_DIR, directory))
+
+# Generate the protobuf modules when grpcio-tools is installed; tests that need
+# them are skipped otherwise
+try:
+    from grpc_tools import protoc
+except ImportError:
+    pass
+else:
+    proto_dir = os.path.join(CODE_DIR, 'order_service', 'protos')
+    out_dir = tempfile.mkdtemp(prefix='protos-')
+    for proto in ('order_service.proto', 'payment_service.proto', 'admin_service.proto'):
+        protoc.main(['protoc', f'-I{proto_dir}', f'--python_out={out_dir}',
+                     f'--grpc_python_out={out_dir}', os.path.join(proto_dir, proto)])
+    sys.path.insert(0, out_dir)
+
+# These are client scripts run against the deployed services, not pytest tests
+collect_ignore = ['test_client.py', 'test_api_gateway.py']
@@ -23,8 +23,48 @@ def test_api_gateway(base_url):
         print(response.text)
         return
     
+    # Test price quotes
+    print("\n2. Testing price quote endpoints")
+    cart = {
+        "restaurant_id": "rest-test-456",
+        "items": [
+            {"name": "Test Pizza", "quantity": 2, "price": 12.99},
+            {"name": "Test Soda", "quantity": 1, "price": 2.99}
+        ]
+    }
+    
+    response = requests.post(f"{base_url}/quote", json=cart)
+    if response.status_code == 200:
+        quote = response.json()
+        print("Quote retrieved successfully!")
+        print(f"Subtotal: ${quote['subtotal']:.2f}, Tax: ${quote['tax']:.2f}, "
+              f"Delivery Fee: ${quote['delivery_fee']:.2f}, Total: ${quote['total']:.2f}")
+        # Expected amounts with the default 8% tax and delivery fee tiers
+        if (quote['subtotal'], quote['tax'], quote['delivery_fee'], quote['total']) != (28.97, 2.32, 2.99, 34.28):
+            print("Quote amounts do not match the default pricing")
+    else:
+        print(f"Quote failed with status code {response.status_code}")
+        print(response.text)
+    
+    response = requests.post(f"{base_url}/quotes", json={"carts": [cart, cart]})
+    if response.status_code == 200 and len(response.json()) == 2:
+        print("Batch quote retrieved successfully!")
+    else:
+        print(f"Batch quote failed with status code {response.status_code}")
+        print(response.text)
+    
+    invalid_cart = {
+        "restaurant_id": "rest-test-456",
+        "items": [{"name": "Test Pizza", "quantity": 1, "price": -12.99}]
+    }
+    response = requests.post(f"{base_url}/quote", json=invalid_cart)
+    if response.status_code == 400:
+        print("Invalid cart rejected as expected")
+    else:
+        print(f"Invalid cart returned status code {response.status_code}, expected 400")
+    
     # Test creating an order
-    print("\n2. Testing order creation")
+    print("\n3. Testing order creation")
     order_data = {
         "customer_id": "cust-test-123",
         "restaurant_id": "rest-test-456",
@@ -59,7 +99,7 @@ def test_api_gateway(base_url):
         return
     
     # Test getting order details
-    print("\n3. Testing get order endpoint")
+    print("\n4. Testing get order endpoint")
     response = requests.get(f"{base_url}/orders/{order_id}")
     if response.status_code == 200:
         order = response.json()
@@ -75,7 +115,7 @@ def test_api_gateway(base_url):
         print(response.text)
     
     # Test updating order status
-    print("\n4. Testing update order status endpoint")
+    print("\n5. Testing update order status endpoint")
     status_data = {
         "status": 2,  # Preparing
         "notes": "Kitchen has started preparing the order"
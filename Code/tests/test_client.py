@@ -41,10 +41,16 @@ def test_order_creation(order_stub):
         response = order_stub.CreateOrder(request)
         print(f"Order created successfully!")
         print(f"Order ID: {response.order_id}")
+        print(f"Subtotal: ${response.subtotal:.2f}")
+        print(f"Tax: ${response.tax:.2f}")
+        print(f"Delivery Fee: ${response.delivery_fee:.2f}")
         print(f"Total: ${response.total:.2f}")
         print(f"Status: {get_order_status_name(response.status)}")
         print(f"Payment Status: {get_payment_status_name(response.payment_status)}")
         
+        if round(response.subtotal + response.tax + response.delivery_fee, 2) != response.total:
+            print("Order total does not equal subtotal + tax + delivery fee")
+        
         # Return order ID for further testing
         return response.order_id
     
@@ -52,6 +58,69 @@ def test_order_creation(order_stub):
         print(f"Error creating order: {e.details()}")
         return None
 
+def test_quote_prices(order_stub):
+    """Test quoting prices for a batch of carts."""
+    print("\n Testing Price Quotes ")
+    
+    carts = [
+        order_service_pb2.Cart(
+            restaurant_id="rest-123",
+            items=[
+                order_service_pb2.OrderItem(name="Margherita Pizza", quantity=2, price=12.99),
+                order_service_pb2.OrderItem(name="Garlic Bread", quantity=1, price=4.99)
+            ]
+        ),
+        order_service_pb2.Cart(
+            restaurant_id="rest-456",
+            items=[
+                order_service_pb2.OrderItem(name="Pad Thai", quantity=3, price=19.99)
+            ]
+        )
+    ]
+    
+    request = order_service_pb2.PriceQuoteRequest(carts=carts)
+    
+    try:
+        response = order_stub.QuotePrices(request)
+        print(f"Quotes retrieved:")
+        for quote in response.quotes:
+            print(f"  - {quote.restaurant_id}: subtotal ${quote.subtotal:.2f}, "
+                  f"tax ${quote.tax:.2f}, delivery ${quote.delivery_fee:.2f}, "
+                  f"total ${quote.total:.2f}")
+        
+        # Expected amounts with the default 8% tax and delivery fee tiers
+        expected = [(30.97, 2.48, 2.99, 36.44), (59.97, 4.80, 0.00, 64.77)]
+        actual = [
+            (quote.subtotal, quote.tax, quote.delivery_fee, quote.total)
+            for quote in response.quotes
+        ]
+        if actual == expected:
+            print("Quote amounts match the default pricing")
+        else:
+            print(f"Quote amounts mismatch: expected {expected}, got {actual}")
+    
+    except grpc.RpcError as e:
+        print(f"Error quoting prices: {e.details()}")
+        return None
+    
+    # Negative quantities must be rejected rather than priced
+    invalid_request = order_service_pb2.PriceQuoteRequest(carts=[
+        order_service_pb2.Cart(
+            restaurant_id="rest-123",
+            items=[order_service_pb2.OrderItem(name="Refund Pizza", quantity=-1, price=12.99)]
+        )
+    ])
+    try:
+        order_stub.QuotePrices(invalid_request)
+        print("Invalid cart was priced instead of being rejected")
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            print(f"Invalid cart rejected: {e.details()}")
+        else:
+            print(f"Unexpected error for invalid cart: {e.details()}")
+    
+    return response
+
 def test_get_order(order_stub, order_id):
     """Test getting order details."""
     print("\n Testing Get Order ")
@@ -97,6 +166,28 @@ def test_update_order_status(order_stub, order_id):
         print(f"Error updating order status: {e.details()}")
         return None
 
+def test_get_delivered_order(order_stub, order_id):
+    """Test that a delivered order can still be read once it may have moved to cold storage."""
+    print("\n Testing Get Delivered Order ")
+    
+    request = order_service_pb2.UpdateOrderStatusRequest(
+        order_id=order_id,
+        status=order_service_pb2.ORDER_DELIVERED
+    )
+    
+    try:
+        order_stub.UpdateOrderStatus(request)
+        response = order_stub.GetOrder(order_service_pb2.GetOrderRequest(order_id=order_id))
+        if response.status == order_service_pb2.ORDER_DELIVERED:
+            print(f"Delivered order {response.order_id} retrieved with total ${response.total:.2f}")
+        else:
+            print(f"Delivered order has status {get_order_status_name(response.status)}")
+        return response
+    
+    except grpc.RpcError as e:
+        print(f"Error getting delivered order: {e.details()}")
+        return None
+
 def test_get_transaction(payment_stub, order):
     """Test getting transaction details."""
     if not order.transaction_id:
@@ -158,24 +249,30 @@ def run_tests(order_service_address, payment_service_address):
     print(f"Order Service: {order_service_address}")
     print(f"Payment Service: {payment_service_address}")
     
-    # Test 1: Create a new order
+    # Test 1: Quote prices without creating an order
+    test_quote_prices(order_stub)
+    
+    # Test 2: Create a new order
     order_id = test_order_creation(order_stub)
     if not order_id:
         print("Order creation failed. Exiting tests.")
         return
     
-    # Test 2: Get order details
+    # Test 3: Get order details
     order = test_get_order(order_stub, order_id)
     if not order:
         print("Get order failed. Continuing with other tests.")
     
-    # Test 3: Update order status
+    # Test 4: Update order status
     updated_order = test_update_order_status(order_stub, order_id)
     
-    # Test 4: Get transaction details (if available)
+    # Test 5: Get transaction details (if available)
     if order:
         transaction = test_get_transaction(payment_stub, order)
     
+    # Test 6: Deliver the order and read it back, from cold storage if it was tiered
+    test_get_delivered_order(order_stub, order_id)
+    
     print("\n Test Suite Completed ")
 
 if __name__ == '__main__':
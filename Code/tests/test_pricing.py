@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from pricing import PricingEngine, to_cents, from_cents
+
+
+def test_to_cents_rounds_half_up():
+    assert to_cents(12.99) == 1299
+    assert to_cents(1.005) == 101
+    assert to_cents(0.145) == 15
+    assert to_cents(0.1) == 10
+    assert to_cents(0) == 0
+    assert from_cents(1299) == 12.99
+
+
+def test_quote_default_rates():
+    quote = PricingEngine().quote('rest-123', [(12.99, 2), (4.99, 1)])
+
+    assert quote.subtotal == 3097
+    assert quote.tax == 248  # 247.76 cents rounded up
+    assert quote.delivery_fee == 299
+    assert quote.total == 3097 + 248 + 299
+
+
+def test_tax_rounds_half_up():
+    engine = PricingEngine(tax_bps=500)
+
+    assert engine.quote('r', [(0.10, 1)]).tax == 1  # 0.5 cents
+    assert engine.quote('r', [(0.09, 1)]).tax == 0  # 0.45 cents
+
+
+@pytest.mark.parametrize('subtotal, fee', [
+    (1, 499),
+    (2499, 499),
+    (2500, 299),
+    (4999, 299),
+    (5000, 0),
+    (10000, 0),
+])
+def test_delivery_fee_tier_boundaries(subtotal, fee):
+    quote = PricingEngine().quote('r', [(from_cents(subtotal), 1)])
+
+    assert quote.subtotal == subtotal
+    assert quote.delivery_fee == fee
+
+
+def test_empty_cart_has_no_delivery_fee():
+    quote = PricingEngine().quote('r', [])
+
+    assert quote == ('r', 0, 0, 0, 0)
+
+
+def test_restaurant_overrides():
+    engine = PricingEngine(restaurant_rates={
+        'rest-low-tax': {'tax_bps': 250},
+        'rest-flat-fee': {'delivery_fees': [(0, 100)]}
+    })
+
+    low_tax = engine.quote('rest-low-tax', [(40.00, 1)])
+    assert low_tax.tax == 100
+    assert low_tax.delivery_fee == 299
+
+    flat_fee = engine.quote('rest-flat-fee', [(60.00, 1)])
+    assert flat_fee.tax == 480
+    assert flat_fee.delivery_fee == 100
+
+    other = engine.quote('rest-other', [(40.00, 1)])
+    assert other.tax == 320
+
+
+def test_from_file(tmp_path):
+    path = tmp_path / 'pricing.json'
+    path.write_text(json.dumps({
+        'default': {'tax_bps': 1000, 'delivery_fees': [[0, 399], [3000, 0]]},
+        'restaurants': {'rest-1': {'tax_bps': 0}}
+    }))
+
+    engine = PricingEngine.from_file(str(path))
+
+    assert engine.quote('rest-2', [(20.00, 1)])[1:] == (2000, 200, 399, 2599)
+    assert engine.quote('rest-1', [(30.00, 1)])[1:] == (3000, 0, 0, 3000)
+
+
+def test_fee_tiers_must_start_at_zero():
+    with pytest.raises(ValueError):
+        PricingEngine(delivery_fees=[(100, 499)])
+
+
+@pytest.mark.parametrize('items', [
+    [(-1.00, 1)],
+    [(float('nan'), 1)],
+    [(float('inf'), 1)],
+    [(1e30, 1)],
+    [(100000.01, 1)],
+    [(0.004, 1)],
+    [(5.00, 0)],
+    [(5.00, -2)],
+])
+def test_invalid_items_are_rejected(items):
+    with pytest.raises(ValueError):
+        PricingEngine().quote('r', items)
+
+
+def test_free_items_and_price_limits_are_accepted():
+    quote = PricingEngine().quote('r', [(0.0, 1), (0.005, 1), (100000, 1)])
+
+    assert quote.subtotal == 10000001
+
+
+def test_quote_batch_matches_single_quotes():
+    engine = PricingEngine(restaurant_rates={'rest-1': {'tax_bps': 600}})
+    carts = [('rest-1', [(9.99, 3)]), ('rest-2', [(55.00, 1)]), ('rest-1', [])]
+
+    assert engine.quote_batch(carts) == [engine.quote(r, items) for r, items in carts]
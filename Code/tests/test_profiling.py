@@ -0,0 +1,128 @@
+import threading
+import tracemalloc
+
+import pytest
+
+pytest.importorskip('grpc')
+pytest.importorskip('admin_service_pb2')
+
+from profiling import (AdminServicer, MemoryTracker, SamplingProfiler, check_debug_token,
+                       clamp_memory_seconds, clamp_profile_seconds, dump_threads,
+                       MAX_MEMORY_SECONDS, MAX_PROFILE_SECONDS, MAX_WAIT_PROFILE_SECONDS)
+
+
+class FakeContext:
+    """Minimal stand-in for a grpc.ServicerContext."""
+
+    def __init__(self, metadata=()):
+        self.metadata = metadata
+        self.code = None
+        self.details = None
+
+    def invocation_metadata(self):
+        return self.metadata
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+
+def test_check_debug_token():
+    assert check_debug_token('secret', 'secret')
+    assert not check_debug_token('wrong', 'secret')
+    assert not check_debug_token(None, 'secret')
+    assert not check_debug_token('', '')
+    assert not check_debug_token('secret', None)
+
+
+def test_memory_trace_stops_tracing():
+    tracker = MemoryTracker({'db': {'a': 1}}, [__file__])
+
+    diff = tracker.trace(seconds=1)
+
+    assert isinstance(diff, str)
+    assert not tracemalloc.is_tracing()
+    assert tracker.store_sizes() == {'db': 1}
+
+
+def test_profiler_returns_collapsed_stacks_without_file(tmp_path):
+    profiler = SamplingProfiler('test', output_dir=str(tmp_path))
+
+    run = profiler.start(1, 5)
+    assert profiler.start(1, 5) is None
+    lines = run.wait().splitlines()
+
+    assert run.output_path is None
+    assert list(tmp_path.iterdir()) == []
+    assert lines
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+
+def test_profiler_writes_file_on_request(tmp_path):
+    profiler = SamplingProfiler('test', output_dir=str(tmp_path))
+
+    run = profiler.start(1, 5, write_file=True)
+    collapsed_stacks = run.wait()
+
+    assert open(run.output_path).read() == collapsed_stacks
+
+
+def test_profile_and_memory_windows_are_capped():
+    assert clamp_profile_seconds(3600, wait=True) == MAX_WAIT_PROFILE_SECONDS
+    assert clamp_profile_seconds(3600, wait=False) == MAX_PROFILE_SECONDS
+    assert clamp_memory_seconds(3600) == MAX_MEMORY_SECONDS
+    assert clamp_profile_seconds(0, wait=True) == 1
+
+
+def test_untracked_memory_trace_reports_all_modules():
+    tracker = MemoryTracker({}, None)
+    allocations = []
+
+    def allocate():
+        threading.Event().wait(0.2)
+        allocations.extend(bytearray(1024) for _ in range(1000))
+
+    thread = threading.Thread(target=allocate)
+    thread.start()
+    diff = tracker.trace(seconds=1)
+    thread.join()
+
+    assert 'test_profiling.py' in diff
+
+
+def test_dump_threads_includes_all_threads():
+    dump, thread_count = dump_threads()
+
+    assert thread_count == len(threading.enumerate())
+    assert 'MainThread' in dump
+
+
+def test_admin_servicer_requires_token():
+    import grpc
+    import admin_service_pb2
+
+    servicer = AdminServicer('test', {}, [__file__], 'secret')
+
+    context = FakeContext()
+    servicer.DumpThreads(admin_service_pb2.DumpThreadsRequest(), context)
+    assert context.code == grpc.StatusCode.PERMISSION_DENIED
+
+    context = FakeContext((('x-debug-token', 'secret'),))
+    response = servicer.DumpThreads(admin_service_pb2.DumpThreadsRequest(), context)
+    assert context.code is None
+    assert response.thread_count > 0
+
+
+def test_store_sizes_split_tiered_stores(tmp_path):
+    from tiering import TieredStore
+
+    store = TieredStore({}, str(tmp_path), name='orders', max_age=0)
+    store.put('a', {'created_at': '2024-01-01T00:00:00'})
+    store.evict()
+    store.put('b', {'created_at': '2999-01-01T00:00:00'})
+
+    tracker = MemoryTracker({'orders': store, 'plain': {'x': 1}}, [__file__])
+
+    assert tracker.store_sizes() == {'orders_hot': 1, 'orders_cold': 1, 'plain': 1}
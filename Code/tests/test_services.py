@@ -0,0 +1,117 @@
+import datetime
+
+import pytest
+
+pytest.importorskip('grpc')
+pytest.importorskip('order_service_pb2')
+
+import grpc
+import order_service_pb2
+import payment_service_pb2
+
+from tiering import TieredStore
+from order_service import OrderServicer, FINISHED_ORDER_STATUSES
+from payment_service import PaymentServicer
+
+LATER = datetime.datetime.now() + datetime.timedelta(days=2)
+
+
+class FakeContext:
+    """Minimal stand-in for a grpc.ServicerContext."""
+
+    def __init__(self):
+        self.code = None
+        self.details = None
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+
+def make_order(order_id, status):
+    timestamp = datetime.datetime.now().isoformat()
+    return {
+        'order_id': order_id, 'customer_id': 'cust-1', 'restaurant_id': 'rest-1',
+        'items': [{'name': 'Pizza', 'quantity': 2, 'price': 12.99}],
+        'subtotal': 25.98, 'tax': 2.08, 'delivery_fee': 2.99, 'total': 31.05,
+        'status': status, 'payment_status': payment_service_pb2.PAYMENT_COMPLETED,
+        'created_at': timestamp, 'updated_at': timestamp
+    }
+
+
+@pytest.fixture
+def order_servicer(tmp_path):
+    store = TieredStore(
+        {}, str(tmp_path), name='orders', max_age=3600,
+        is_cold=lambda order: order['status'] in FINISHED_ORDER_STATUSES
+    )
+    store.put('delivered', make_order('delivered', order_service_pb2.ORDER_DELIVERED))
+    store.put('preparing', make_order('preparing', order_service_pb2.ORDER_PREPARING))
+    store.evict(now=LATER)
+    return OrderServicer('localhost:0', order_store=store)
+
+
+def test_get_order_falls_back_to_segments(order_servicer):
+    assert 'delivered' not in order_servicer.order_store.hot
+
+    context = FakeContext()
+    response = order_servicer.GetOrder(order_service_pb2.GetOrderRequest(order_id='delivered'), context)
+
+    assert context.code is None
+    assert response.status == order_service_pb2.ORDER_DELIVERED
+    assert response.total == 31.05
+    assert response.items[0].name == 'Pizza'
+
+
+def test_get_order_not_found(order_servicer):
+    context = FakeContext()
+    order_servicer.GetOrder(order_service_pb2.GetOrderRequest(order_id='missing'), context)
+
+    assert context.code == grpc.StatusCode.NOT_FOUND
+
+
+def test_update_order_status_promotes_cold_order(order_servicer):
+    context = FakeContext()
+    response = order_servicer.UpdateOrderStatus(order_service_pb2.UpdateOrderStatusRequest(
+        order_id='delivered', status=order_service_pb2.ORDER_CANCELLED
+    ), context)
+
+    assert context.code is None
+    assert response.status == order_service_pb2.ORDER_CANCELLED
+    assert order_servicer.order_store.hot['delivered']['status'] == order_service_pb2.ORDER_CANCELLED
+
+
+@pytest.mark.parametrize('price', [-1.0, 1e30, 0.001])
+def test_quote_prices_rejects_invalid_items(order_servicer, price):
+    context = FakeContext()
+    order_servicer.QuotePrices(order_service_pb2.PriceQuoteRequest(carts=[
+        order_service_pb2.Cart(
+            restaurant_id='rest-1',
+            items=[order_service_pb2.OrderItem(name='Pizza', quantity=1, price=price)]
+        )
+    ]), context)
+
+    assert context.code == grpc.StatusCode.INVALID_ARGUMENT
+
+
+def test_get_transaction_falls_back_to_segments(tmp_path):
+    store = TieredStore({}, str(tmp_path), name='transactions', max_age=3600,
+                        timestamp_fields=('created_at',))
+    store.put('txn-1', {
+        'transaction_id': 'txn-1', 'order_id': 'order-1', 'amount': 31.05,
+        'payment_method': payment_service_pb2.CREDIT_CARD,
+        'status': payment_service_pb2.PAYMENT_COMPLETED,
+        'created_at': datetime.datetime.now().isoformat()
+    })
+    store.evict(now=LATER)
+    servicer = PaymentServicer('localhost:0', store)
+
+    context = FakeContext()
+    response = servicer.GetTransaction(payment_service_pb2.GetTransactionRequest(transaction_id='txn-1'),
+                                       context)
+
+    assert 'txn-1' not in store.hot
+    assert context.code is None
+    assert response.amount == 31.05
@@ -0,0 +1,190 @@
+import os
+import datetime
+
+import pytest
+
+from tiering import Segment, TieredStore, encode_record, merge_segments, write_segment
+
+NOW = datetime.datetime(2024, 1, 10, 12, 0)
+OLD = (NOW - datetime.timedelta(days=2)).isoformat()
+RECENT = (NOW - datetime.timedelta(minutes=5)).isoformat()
+
+
+def make_store(segment_dir, hot=None, **kwargs):
+    return TieredStore(
+        {} if hot is None else hot, str(segment_dir), name='orders', max_age=3600,
+        is_cold=lambda record: record['status'] == 'delivered', **kwargs
+    )
+
+
+def add_orders(store, count, status='delivered', updated_at=OLD, prefix='order'):
+    for i in range(count):
+        store.put(f"{prefix}-{i:04d}", {
+            'order_id': f"{prefix}-{i:04d}",
+            'status': status,
+            'items': [{'name': 'Pizza\tslice', 'note': 'line\nbreak', 'price': 12.99}],
+            'updated_at': updated_at
+        })
+
+
+def test_segment_round_trip(tmp_path):
+    records = {f"key-{i:03d}": {'value': i, 'text': 'é\t\n'} for i in range(100)}
+    path = str(tmp_path / 'test-00000000.seg')
+
+    write_segment(path, ((key, encode_record(records[key])) for key in sorted(records)),
+                  len(records), block_size=7)
+    segment = Segment(path)
+
+    assert segment.count == 100
+    assert len(segment.offsets) == 15
+    for key, record in records.items():
+        assert segment.get(key) == record
+    assert dict(segment.items()) == records
+    assert segment.get('key-') is None
+    assert segment.get('key-0505') is None
+    assert segment.get('zzz') is None
+
+
+def test_empty_segment_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_segment(str(tmp_path / 'empty.seg'), [], 0)
+
+
+def test_bloom_filter_rejects_most_missing_keys(tmp_path):
+    path = str(tmp_path / 'test-00000000.seg')
+    write_segment(path, ((f"key-{i:05d}", b'{}') for i in range(2000)), 2000)
+    segment = Segment(path)
+
+    from tiering import bloom_hashes
+    assert all(segment.might_contain(bloom_hashes(f"key-{i:05d}")) for i in range(2000))
+    false_positives = sum(
+        segment.might_contain(bloom_hashes(f"key-{i:05d}x")) for i in range(2000)
+    )
+    assert false_positives < 100
+
+
+def test_evict_moves_only_old_finished_records(tmp_path):
+    store = make_store(tmp_path)
+    add_orders(store, 10, prefix='old')
+    add_orders(store, 10, status='preparing', prefix='open')
+    add_orders(store, 10, updated_at=RECENT, prefix='recent')
+
+    assert store.evict(now=NOW) == 10
+    assert len(store.hot) == 20
+    assert store.cold_count == 10
+    assert store.segment_count == 1
+    assert 'old-0003' not in store.hot
+    assert store.get('old-0003')['items'][0]['note'] == 'line\nbreak'
+    assert store.get('missing') is None
+    assert store.evict(now=NOW) == 0
+
+
+def test_evict_without_segment_dir_is_a_no_op():
+    store = TieredStore({'a': {'status': 'delivered', 'updated_at': OLD}})
+
+    assert store.evict(now=NOW) == 0
+    assert store.get('a') is not None
+
+
+def test_update_promotes_cold_record(tmp_path):
+    store = make_store(tmp_path)
+    add_orders(store, 5)
+    store.evict(now=NOW)
+
+    record = store.update('order-0002', status='refunded', updated_at=NOW.isoformat())
+
+    assert record['status'] == 'refunded'
+    assert store.hot['order-0002'] is record
+    assert store.get('order-0002')['status'] == 'refunded'
+    assert store.update('missing', status='x') is None
+
+
+def test_compaction_keeps_newest_copy(tmp_path):
+    store = make_store(tmp_path, max_segments=3)
+    for round_number in range(3):
+        add_orders(store, 20, prefix=f"round{round_number}")
+        store.evict(now=NOW)
+
+    # Re-tier an order with a newer status so it exists in two segments
+    store.update('round0-0001', status='delivered', note='second copy', updated_at=OLD)
+    store.evict(now=NOW)
+
+    assert store.segment_count == 1
+    assert store.cold_count == 60
+    assert store.get('round0-0001')['note'] == 'second copy'
+    assert store.get('round2-0019') is not None
+    assert sorted(os.listdir(tmp_path)) == ['orders-00000004.seg']
+
+
+def test_compaction_leaves_large_base_segment_alone(tmp_path):
+    store = make_store(tmp_path, max_segments=3)
+    add_orders(store, 500, prefix='base')
+    store.evict(now=NOW)
+    base_path = store._segments[0].path
+    base_stat = os.stat(base_path)
+
+    for round_number in range(3):
+        add_orders(store, 5, prefix=f"small{round_number}")
+        store.evict(now=NOW)
+
+    assert store.segment_count == 2
+    assert store._segments[0].path == base_path
+    assert os.stat(base_path).st_mtime_ns == base_stat.st_mtime_ns
+    assert store.cold_count == 515
+    assert store.get('base-0499') is not None
+    assert store.get('small2-0004') is not None
+
+
+def test_evict_keeps_records_changed_during_write(tmp_path, monkeypatch):
+    import tiering
+
+    store = make_store(tmp_path)
+    add_orders(store, 5)
+    write = tiering.write_segment
+
+    def write_and_update(*args, **kwargs):
+        store.update('order-0001', note='changed while writing')
+        store.put('order-0002', {'order_id': 'order-0002', 'status': 'delivered', 'updated_at': OLD})
+        write(*args, **kwargs)
+
+    monkeypatch.setattr(tiering, 'write_segment', write_and_update)
+
+    assert store.evict(now=NOW) == 3
+    assert sorted(store.hot) == ['order-0001', 'order-0002']
+    assert store.get('order-0001')['note'] == 'changed while writing'
+    assert 'items' not in store.get('order-0002')
+
+
+def test_merge_segments_prefers_later_segments(tmp_path):
+    paths = []
+    for i, records in enumerate([{'a': 1, 'b': 1}, {'b': 2, 'c': 2}, {'c': 3}]):
+        path = str(tmp_path / f"m-{i:08d}.seg")
+        write_segment(path, [(key, encode_record(value)) for key, value in sorted(records.items())],
+                      len(records))
+        paths.append(path)
+
+    merged = [(key, record) for key, record in merge_segments([Segment(path) for path in paths])]
+
+    assert merged == [('a', b'1'), ('b', b'2'), ('c', b'3')]
+
+
+def test_segments_are_reloaded_after_restart(tmp_path):
+    store = make_store(tmp_path, max_segments=2)
+    for round_number in range(4):
+        add_orders(store, 5, prefix=f"round{round_number}")
+        store.evict(now=NOW)
+    store.update('round1-0000', status='delivered', note='newest', updated_at=OLD)
+    store.evict(now=NOW)
+
+    reloaded = make_store(tmp_path)
+
+    assert reloaded.segment_count == store.segment_count
+    assert reloaded.get('round1-0000')['note'] == 'newest'
+    assert reloaded.get('round3-0004') is not None
+    assert sorted(reloaded.cold_keys()) == sorted(store.cold_keys())
+
+    # New segments continue the sequence instead of overwriting existing ones
+    add_orders(reloaded, 1, prefix='after-restart')
+    reloaded.evict(now=NOW)
+    assert reloaded.get('after-restart-0000') is not None
+    assert reloaded.get('round0-0000') is not None